@@ -4,22 +4,44 @@ if __package__:
 else:
     from _version import __version__
 import argparse
+import bisect
+import concurrent.futures
 import configparser
 import datetime
+import functools
 import hashlib
 import importlib
 import ipaddress
 import json
 import logging
 import os
-import random
 import re
 import socket
 import sys
-from contextlib import closing
+import threading
+from contextlib import closing, contextmanager, nullcontext
 from logging.handlers import WatchedFileHandler
 from urllib.parse import urlparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+URL_REGEX = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://(?P<netloc>[^/?#\t\r\n]*)(?P<path>[^?#\t\r\n]*)"
+                       r"(?:\?(?P<query>[^#\t\r\n]*))?(?:#[^\t\r\n]*)?")
+QUERY_PARAM_REGEX = re.compile(r"(?:^|&)([^=&]*)=[^&]")
+GLOBAL_FLAGS_REGEX = re.compile(r"^\(\?([imsx]+)\)")
+
+HOST_CACHE_SIZE = 65536
+HOST_CACHE = {}
+HOST_CACHE_LOCK = threading.Lock()
+
 
 def main():
     args, parser = get_main_args_parser()
@@ -54,10 +76,9 @@ def main():
             or args.flush_fingerprints or args.list_unscanned:
 
         db = TargetDatabase(args.database)
+        db.connect()
 
-        pattern = "^[^:]+://.*$"
-        regex = re.compile(pattern)
-        if (regex.match(args.database)):
+        if "://" in args.database:
             blocklist = Blocklist(args.database)
         else:
             blocklist = Blocklist("sqlite3://" + args.database)
@@ -65,13 +86,17 @@ def main():
         blocklists = [blocklist]
         if args.external_blocklist:
             for external_blocklist in args.external_blocklist:
-                blocklists.append(Blocklist(external_blocklist))
-
-        if args.flush_blocklist: blocklist.flush()
-        if args.add_blocklist_item: blocklist.add(args.add_blocklist_item)
-        if args.delete_blocklist_item: blocklist.delete(args.delete_blocklist_item)
-        if args.list_blocklist:
-            for item in blocklist.get_parsed_items(): print(item)
+                with Blocklist(external_blocklist) as external:
+                    blocklists.append(external)
+
+        with blocklist:
+            if args.flush_blocklist or args.add_blocklist_item or args.delete_blocklist_item:
+                with blocklist.batch():
+                    if args.flush_blocklist: blocklist.flush()
+                    if args.add_blocklist_item: blocklist.add_many(args.add_blocklist_item)
+                    if args.delete_blocklist_item: blocklist.delete(args.delete_blocklist_item)
+            if args.list_blocklist:
+                for item in blocklist.get_parsed_items(): print(item)
 
         if args.flush_fingerprints: db.flush_fingerprints()
 
@@ -101,13 +126,12 @@ def main():
             except KeyboardInterrupt:
                 sys.exit(1)
 
-        db = TargetDatabase(args.database)
+        db.connect()
         if args.list_targets or args.list_unscanned:
             try:
-                urls = db.get_urls(unscanned_only=args.list_unscanned, source=args.source, randomize=args.random)
-                if args.count > 0:
-                    urls = urls[:args.count]
-                for url in urls:
+                for url in db.iter_urls(unscanned_only=args.list_unscanned, source=args.source,
+                                        randomize=args.random or args.fast_random, count=args.count,
+                                        fast_random=args.fast_random):
                     print(url)
             except BrokenPipeError:
                 devnull = os.open(os.devnull, os.O_WRONLY)
@@ -141,6 +165,7 @@ def initialize_logger(log_file, verbose):
         log.addHandler(log_streamhandler)
 
 
+@functools.lru_cache(maxsize=None)
 def load_module(category, name):
     module_name = "%s.%s" % (category, name)
     if __package__: module_name = "." + module_name
@@ -153,6 +178,21 @@ def load_module(category, name):
     return module
 
 
+@functools.lru_cache(maxsize=4)
+def load_config(path, mtime):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+@functools.lru_cache(maxsize=32)
+def load_config_section(path, mtime, section):
+    config = load_config(path, mtime)
+    if not config.has_section(section):
+        return {}
+    return dict(config.items(section))
+
+
 def get_initial_args_parser():
     config_dir = os.path.abspath(os.path.expanduser(
         os.environ.get("XDG_CONFIG_HOME") or
@@ -177,6 +217,8 @@ def get_initial_args_parser():
                           help="number of urls to scan, or -1 to scan all urls")
     global_scanner_options.add_argument("--random", action="store_true", \
                           help="retrieve urls in random order")
+    global_scanner_options.add_argument("--pretty-reports", action="store_true", \
+                          help="write indented reports with sorted keys")
     initial_args, other_args = initial_parser.parse_known_args()
 
     return initial_args, other_args, initial_parser
@@ -190,15 +232,8 @@ def get_main_args_parser():
     }
 
     if os.path.isfile(initial_args.config):
-        config = configparser.ConfigParser()
-        config.read(initial_args.config)
-        try:
-            config_items = config.items("dorkbot")
-            defaults.update(dict(config_items))
-        except KeyError:
-            pass
-        except configparser.NoSectionError as e:
-            logging.debug(e)
+        mtime = os.stat(initial_args.config).st_mtime_ns
+        defaults.update(load_config_section(initial_args.config, mtime, "dorkbot"))
 
     if initial_args.show_defaults:
         parser = argparse.ArgumentParser(parents=[initial_parser], add_help=False, \
@@ -227,6 +262,8 @@ def get_main_args_parser():
                          help="List targets in database")
     targets.add_argument("--list-unscanned", action="store_true", \
                          help="List unscanned targets in database")
+    targets.add_argument("--fast-random", action="store_true", \
+                         help="List a ~1%% random sample of targets (PostgreSQL only, may return fewer than --count)")
     targets.add_argument("--add-target", metavar="TARGET", \
                          help="Add a url to the target database")
     targets.add_argument("--delete-target", metavar="TARGET", \
@@ -253,8 +290,8 @@ def get_main_args_parser():
     blocklist = parser.add_argument_group('blocklist')
     blocklist.add_argument("--list-blocklist", action="store_true", \
                            help="List internal blocklist entries")
-    blocklist.add_argument("--add-blocklist-item", metavar="ITEM", \
-                           help="Add an ip/host/regex pattern to the internal blocklist")
+    blocklist.add_argument("--add-blocklist-item", metavar="ITEM", action="append", \
+                           help="Add an ip/host/regex pattern to the internal blocklist (can be used multiple times)")
     blocklist.add_argument("--delete-blocklist-item", metavar="ITEM", \
                            help="Delete an item from the internal blocklist")
     blocklist.add_argument("--flush-blocklist", action="store_true", \
@@ -273,24 +310,9 @@ def get_module_parser(module, parent_parser=None):
     module_defaults = {}
 
     if os.path.isfile(initial_args.config):
-        config = configparser.ConfigParser()
-        config.read(initial_args.config)
-
-        try:
-            config_items = config.items("dorkbot")
-            defaults.update(dict(config_items))
-        except KeyError:
-            pass
-        except configparser.NoSectionError as e:
-            logging.debug(e)
-
-        try:
-            module_config_items = config.items(module.__name__)
-            module_defaults.update(dict(module_config_items))
-        except KeyError:
-            pass
-        except configparser.NoSectionError as e:
-            logging.debug(e)
+        mtime = os.stat(initial_args.config).st_mtime_ns
+        defaults.update(load_config_section(initial_args.config, mtime, "dorkbot"))
+        module_defaults.update(load_config_section(initial_args.config, mtime, module.__name__))
 
     if parent_parser:
         initial_parser = parent_parser
@@ -317,7 +339,7 @@ def format_module_args(args_list):
     if args_list:
         for arg in args_list:
             if arg.startswith("--"):
-                args.add(arg)
+                args.append(arg)
             else:
                 args.append("--" + arg)
 
@@ -334,12 +356,15 @@ def index(db, blocklists, indexer, args, indexer_args):
     else:
         source = module_source
 
+    Target.prefetch_resolve(urls)
+    blocklist = Blocklist.merge(blocklists)
+
     targets = []
-    for url in urls:
-            if True in [blocklist.match(Target(url)) for blocklist in blocklists]:
-                logging.debug("Ignoring (matches blocklist pattern): %s", url)
-                continue
-            targets.append(url)
+    for url, blocked in zip(urls, blocklist.match_batch(Target(url) for url in urls)):
+        if blocked:
+            logging.debug("Ignoring (matches blocklist pattern): %s", url)
+            continue
+        targets.append(url)
 
     db.connect()
     db.add_targets(targets, source)
@@ -362,87 +387,200 @@ def scan(db, blocklists, scanner, args, scanner_args):
             logging.error("Failed to create report directory - %s", str(e))
             sys.exit(1)
 
-    scanned = 0
-    while scanned < args.count or args.count == -1:
-        db.connect()
-        target = db.get_next_target(random=args.random)
-        if not target:
-            break
+    batch = 256
+    if args.count >= 0:
+        batch = min(batch, args.count)
 
-        if True in [blocklist.match(target) for blocklist in blocklists]:
+    report_dir_fd = None
+    if os.open in os.supports_dir_fd:
+        report_dir_fd = os.open(scanner_args.report_dir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+
+    blocklist = Blocklist.merge(blocklists)
+
+    db.connect()
+    scanned = 0
+    for target in db.iter_unscanned(batch=batch, random=args.random):
+        if blocklist.match(target):
             logging.debug("Deleting (matches blocklist pattern): %s", target.url)
+            db._ensure_connected()
             db.delete_target(target.url)
             continue
 
-        db.close()
-
         logging.info("Scanning: %s", target.url)
         results = scanner.run(scanner_args, target)
         scanned += 1
 
         if results == False:
             logging.error("Scan failed: %s", target.url)
-            continue
+        else:
+            target.endtime = generate_timestamp()
+            target.write_report(scanner_args.report_dir, scanner_args.label, results,
+                                pretty=args.pretty_reports, report_dir_fd=report_dir_fd)
+
+        if scanned == args.count:
+            break
+    db.close()
 
-        target.endtime = generate_timestamp()
-        target.write_report(scanner_args.report_dir, scanner_args.label, results)
+    if report_dir_fd is not None:
+        os.close(report_dir_fd)
 
 
-def generate_fingerprint(target):
-    url_parts = urlparse(target.url)
-    netloc = url_parts.netloc
-    depth = str(url_parts.path.count("/"))
-    page = url_parts.path.split("/")[-1]
-    params = []
-    for param in url_parts.query.split("&"):
-        split = param.split("=", 1)
-        if len(split) == 2 and split[1]:
-            params.append(split[0])
-    fingerprint = "|".join((netloc, depth, page, ",".join(sorted(params))))
-    return generate_hash(fingerprint)
+def generate_fingerprint(target, algorithm="blake2b"):
+    url_match = URL_REGEX.fullmatch(target.url)
+    if url_match and ";" not in url_match["path"]:
+        netloc, path, query = url_match.group("netloc", "path", "query")
+    else:
+        url_parts = urlparse(target.url)
+        netloc, path, query = url_parts.netloc, url_parts.path, url_parts.query
+    depth = str(path.count("/"))
+    page = path.rsplit("/", 1)[-1]
+    params = sorted(param_match[1] for param_match in QUERY_PARAM_REGEX.finditer(query or ""))
+    fingerprint = "|".join((netloc, depth, page, ",".join(params)))
+    return generate_hash(fingerprint, algorithm)
 
 
 def generate_timestamp():
     return datetime.datetime.now().astimezone().isoformat()
 
 
-def generate_hash(url):
-    return hashlib.md5(url.encode("utf-8")).hexdigest()
+def generate_hash(url, algorithm="blake2b"):
+    if algorithm == "md5":
+        return hashlib.md5(url.encode("utf-8")).digest()
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+def compile_regex_set(patterns):
+    patterns = list(patterns)
+    if not patterns:
+        return None
+
+    if len(patterns) == 1:
+        pattern = patterns[0]
+    else:
+        alternatives = []
+        for regex in patterns:
+            flags = GLOBAL_FLAGS_REGEX.match(regex)
+            if flags:
+                # global flags are only valid at the start of the combined pattern
+                alternatives.append("(?%s:%s)" % (flags.group(1), regex[flags.end():]))
+            else:
+                alternatives.append("(?:%s)" % regex)
+        pattern = "|".join(alternatives)
+
+    if re2:
+        try:
+            return re2.compile(pattern)
+        except Exception as e:
+            logging.debug("Falling back to re for blocklist patterns - %s", str(e))
+
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        logging.error("Failed to compile blocklist regex - %s", str(e))
+        sys.exit(1)
+
+
+def resolve_host(host):
+    if not host:
+        return None
+
+    ip = HOST_CACHE.get(host, False)
+    if ip is not False:
+        return ip
+
+    try:
+        ip = ipaddress.ip_address(socket.gethostbyname(host))
+    except socket.gaierror:
+        ip = None
+    except Exception:
+        logging.exception("Failed to resolve hostname: %s", host)
+        ip = None
+
+    with HOST_CACHE_LOCK:
+        if len(HOST_CACHE) >= HOST_CACHE_SIZE:
+            del HOST_CACHE[next(iter(HOST_CACHE))]
+        HOST_CACHE[host] = ip
+
+    return ip
+
+
+def match_host_suffix(host, suffixes):
+    i = host.find(".")
+    while i >= 0:
+        if host[i:] in suffixes:
+            return True
+        i = host.find(".", i + 1)
+    return False
+
+
+def match_target(target, hosts, host_suffixes, ip_networks, regex_match):
+    if target.host in hosts:
+        return True
+
+    if host_suffixes and target.host and match_host_suffix(target.host, host_suffixes):
+        return True
+
+    if ip_networks and target.ip and ip_networks.contains_int(target.ip.version, target.ip_int):
+        return True
+
+    if regex_match and regex_match(target.url):
+        return True
+
+    return False
+
+
+def parse_cidr(cidr):
+    address, separator, prefix = cidr.partition("/")
+    for family, version, bits in ((socket.AF_INET, 4, 32), (socket.AF_INET6, 6, 128)):
+        try:
+            packed = socket.inet_pton(family, address)
+        except OSError:
+            continue
+
+        if not separator:
+            prefixlen = bits
+        elif prefix.isascii() and prefix.isdigit() and int(prefix) <= bits:
+            prefixlen = int(prefix)
+        else:
+            break
+
+        net_int = int.from_bytes(packed, "big")
+        if net_int & ((1 << (bits - prefixlen)) - 1):
+            raise ValueError("%s has host bits set" % cidr)
+        return version, net_int, prefixlen
+
+    ip_net = ipaddress.ip_network(cidr)
+    return ip_net.version, int(ip_net.network_address), ip_net.prefixlen
 
 
 class TargetDatabase:
     def __init__(self, database):
         self.connect_kwargs = {}
+        self.db = None
+        self.pool = None
+        self.initialized = False
         if database.startswith("postgresql://"):
             self.database = database
-            module_name = "psycopg2"
+            self.module_name = "psycopg2"
+            self.binary = "BYTEA"
             self.insert = "INSERT"
             self.conflict = "ON CONFLICT DO NOTHING"
         elif database.startswith("phoenixdb://"):
-            module_name = "phoenixdb"
+            self.module_name = "phoenixdb"
+            self.binary = "VARBINARY"
             self.database = database[12:]
             self.insert = "UPSERT"
             self.conflict = ""
             self.connect_kwargs["autocommit"] = True
         else:
-            module_name = "sqlite3"
+            self.module_name = "sqlite3"
+            self.binary = "BLOB"
             self.database = os.path.expanduser(database)
             database_dir = os.path.dirname(self.database)
             self.insert = "INSERT OR REPLACE"
             self.conflict = ""
 
-        try:
-            self.module = importlib.import_module(module_name, package=None)
-        except ModuleNotFoundError:
-            logging.error("Failed to load required module - %s", module_name)
-            sys.exit(1)
-
-        if self.module.paramstyle == "qmark":
-            self.param = "?"
-        else:
-            self.param = "%s"
-
-        if module_name == "sqlite3" and not os.path.isfile(self.database):
+        if self.module_name == "sqlite3" and not os.path.isfile(self.database):
             logging.debug("Creating database file - %s", self.database)
 
             if database_dir and not os.path.isdir(database_dir):
@@ -452,149 +590,307 @@ class TargetDatabase:
                     logging.error("Failed to create directory - %s", str(e))
                     sys.exit(1)
 
-        self.connect()
+    @functools.cached_property
+    def module(self):
         try:
-            with self.db, closing(self.db.cursor()) as c:
-                c.execute("CREATE TABLE IF NOT EXISTS targets (url VARCHAR PRIMARY KEY, source VARCHAR, scanned INTEGER DEFAULT 0)")
-                c.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint VARCHAR PRIMARY KEY)")
-                c.execute("CREATE TABLE IF NOT EXISTS blocklist (item VARCHAR PRIMARY KEY)")
-        except self.module.Error as e:
-            logging.error("Failed to load database - %s", str(e))
+            return importlib.import_module(self.module_name, package=None)
+        except ModuleNotFoundError:
+            logging.error("Failed to load required module - %s", self.module_name)
             sys.exit(1)
 
+    @functools.cached_property
+    def param(self):
+        if self.module.paramstyle == "qmark":
+            return "?"
+        else:
+            return "%s"
+
     def connect(self):
         try:
-            self.db = self.module.connect(self.database, **self.connect_kwargs)
+            if self.module_name == "psycopg2":
+                if not self.pool:
+                    pool_module = importlib.import_module("psycopg2.pool", package=None)
+                    self.pool = pool_module.ThreadedConnectionPool(2, max(4, (os.cpu_count() or 1) * 2),
+                                                                   self.database, **self.connect_kwargs)
+            else:
+                self.db = self.module.connect(self.database, **self.connect_kwargs)
+                if self.module_name == "sqlite3":
+                    with closing(self.db.cursor()) as c:
+                        c.execute("PRAGMA journal_mode=WAL")
+                        c.execute("PRAGMA synchronous=NORMAL")
+                        c.execute("PRAGMA cache_size=-64000")
+                        c.execute("PRAGMA temp_store=MEMORY")
         except self.module.Error as e:
             logging.error("Error loading database - %s", str(e))
             sys.exit(1)
 
+        self._maybe_init_schema()
+
+    def _maybe_init_schema(self):
+        if self.initialized:
+            return
+
+        try:
+            with self._conn() as db, closing(db.cursor()) as c:
+                c.execute("CREATE TABLE IF NOT EXISTS targets (url VARCHAR PRIMARY KEY, source VARCHAR, scanned INTEGER DEFAULT 0)")
+                c.execute("CREATE TABLE IF NOT EXISTS blocklist (item VARCHAR PRIMARY KEY)")
+                c.execute("CREATE TABLE IF NOT EXISTS settings (name VARCHAR PRIMARY KEY, value VARCHAR)")
+                c.execute("CREATE INDEX IF NOT EXISTS idx_targets_scanned ON targets (scanned)")
+
+                c.execute("SELECT name, value FROM settings")
+                settings = dict(c.fetchall())
+
+                legacy_fingerprints = []
+                if settings.get("fingerprint_format") != "binary":
+                    # older databases store fingerprints as hex strings
+                    c.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint VARCHAR PRIMARY KEY)")
+                    c.execute("SELECT fingerprint FROM fingerprints")
+                    legacy_fingerprints = [(bytes.fromhex(row[0]),) for row in c.fetchall()]
+                    if self.module_name == "sqlite3":
+                        c.execute("BEGIN")
+                    c.execute("DROP TABLE fingerprints")
+                    c.execute("CREATE TABLE fingerprints (fingerprint %s PRIMARY KEY)" % self.binary)
+                    c.executemany("%s INTO fingerprints VALUES (%s)" % (self.insert, self.param), legacy_fingerprints)
+                    c.execute("%s INTO settings VALUES (%s, %s) %s" % (self.insert, self.param, self.param, self.conflict),
+                              ("fingerprint_format", "binary"))
+
+                if "fingerprint_hash" in settings:
+                    self.fingerprint_hash = settings["fingerprint_hash"]
+                else:
+                    # fingerprints stored before the hash was recorded are md5
+                    if legacy_fingerprints:
+                        self.fingerprint_hash = "md5"
+                    else:
+                        self.fingerprint_hash = "blake2b"
+                    c.execute("%s INTO settings VALUES (%s, %s) %s" % (self.insert, self.param, self.param, self.conflict),
+                              ("fingerprint_hash", self.fingerprint_hash))
+        except self.module.Error as e:
+            logging.error("Failed to load database - %s", str(e))
+            sys.exit(1)
+
+        self.initialized = True
+
+    def _ensure_connected(self):
+        if self.module_name != "psycopg2":
+            return
+
+        for i in range(3):
+            try:
+                with self._conn() as db, closing(db.cursor()) as c:
+                    c.execute("SELECT 1")
+                return
+            except self.module.Error as e:
+                if "connection already closed" in str(e) or "server closed the connection unexpectedly" in str(e):
+                    # every idle connection in the pool is likely dead too, so rebuild it
+                    logging.warning("Database connection lost (reconnecting) - %s", str(e))
+                    self.close()
+                    self.connect()
+                else:
+                    logging.error("Failed to check database connection - %s", str(e))
+                    sys.exit(1)
+
+        logging.error("Failed to reconnect to database")
+        sys.exit(1)
+
     def close(self):
-        self.db.close()
+        if self.pool:
+            logging.debug("Closing database connection pool (%d connections)", self.pool_size())
+            self.pool.closeall()
+            self.pool = None
+        else:
+            self.db.close()
+
+    @contextmanager
+    def _conn(self):
+        if not self.pool:
+            with self.db:
+                yield self.db
+            return
 
-    def get_urls(self, unscanned_only=False, source=False, randomize=False):
+        pool = self.pool
+        db = pool.getconn()
+        try:
+            with db:
+                yield db
+        finally:
+            pool.putconn(db, close=bool(db.closed))
+
+    def pool_size(self):
+        if self.pool:
+            # psycopg2 does not expose the pool size publicly
+            return len(getattr(self.pool, "_pool", [])) + len(getattr(self.pool, "_used", []))
+        elif self.db:
+            return 1
+        else:
+            return 0
+
+    def get_urls(self, unscanned_only=False, source=False, randomize=False, count=-1, fast_random=False):
+        return list(self.iter_urls(unscanned_only=unscanned_only, source=source, randomize=randomize, count=count,
+                                   fast_random=fast_random))
+
+    def iter_urls(self, unscanned_only=False, source=False, randomize=False, count=-1, fast_random=False, batch=1000):
         fields = "url"
         if source is True:
             fields += ",source"
 
         sql = f"SELECT {fields} FROM targets"
+        if randomize and fast_random and self.module_name == "psycopg2":
+            sql += " TABLESAMPLE BERNOULLI (1)"
+        params = ()
         if unscanned_only:
-            sql += " WHERE scanned != 1"
+            sql += " WHERE scanned = 0"
+        if source and source is not True:
+            if "WHERE" in sql:
+                sql += " AND "
+            else:
+                sql += " WHERE "
+            sql += "source = %s" % self.param
+            params = (source,)
+        if randomize:
+            sql += " ORDER BY RANDOM()"
+        if count > 0:
+            sql += " LIMIT %d" % count
 
         try:
-            with self.db, closing(self.db.cursor()) as c:
-                if source and source is not True:
-                    if "WHERE" in sql:
-                        sql += " AND "
-                    else:
-                        sql += " WHERE "
-                    sql += "source = %s" % self.param
-                    c.execute(sql, (source,))
+            with self._conn() as db:
+                if self.module_name == "psycopg2":
+                    cursor = db.cursor(name="dorkbot_urls")
                 else:
-                    c.execute(sql)
-                urls = [" | ".join(row) for row in c.fetchall()]
+                    cursor = db.cursor()
+                with closing(cursor) as c:
+                    if params:
+                        c.execute(sql, params)
+                    else:
+                        c.execute(sql)
+                    while True:
+                        rows = c.fetchmany(batch)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield " | ".join(row)
         except self.module.Error as e:
             logging.error("Failed to get targets - %s", str(e))
             sys.exit(1)
 
-        if randomize:
-            random.shuffle(urls)
-
-        return urls
-
-    def get_next_target(self, random=False):
-        sql = "SELECT url FROM targets WHERE scanned != 1"
+    def iter_unscanned(self, batch=256, random=False):
+        sql = "SELECT url FROM targets WHERE scanned = 0"
         if random:
             sql += " ORDER BY RANDOM()"
+        sql += " LIMIT %d" % batch
 
-        try:
-            with self.db, closing(self.db.cursor()) as c:
-                c.execute(sql)
-                while True:
-                    row = c.fetchone()
-                    if not row:
-                        target = None
-                        break
-                    url = row[0]
-                    target = Target(url)
-                    fingerprint = generate_fingerprint(target)
-                    self.mark_scanned(url, c)
-                    if self.get_scanned(fingerprint, c):
+        while True:
+            self._ensure_connected()
+            targets = {}
+            duplicates = {}
+            try:
+                with self._conn() as db, closing(db.cursor()) as c:
+                    c.execute(sql)
+                    urls = [row[0] for row in c.fetchall()]
+                    if not urls:
+                        return
+
+                    Target.prefetch_resolve(urls)
+                    for url in urls:
+                        target = Target(url)
+                        fingerprint = generate_fingerprint(target, self.fingerprint_hash)
+                        if fingerprint in targets:
+                            logging.debug("Skipping (matches fingerprint of previous scan): %s", target.url)
+                            duplicates[fingerprint].append((url,))
+                            continue
+                        targets[fingerprint] = target
+                        duplicates[fingerprint] = [(url,)]
+
+                    fingerprints = list(targets)
+                    c.execute("SELECT fingerprint FROM fingerprints WHERE fingerprint IN (%s)"
+                              % ",".join([self.param] * len(fingerprints)), fingerprints)
+                    scanned_urls = []
+                    for row in c.fetchall():
+                        fingerprint = bytes(row[0])
+                        target = targets.pop(fingerprint)
                         logging.debug("Skipping (matches fingerprint of previous scan): %s", target.url)
-                        continue
-                    else:
-                        c.execute("%s INTO fingerprints VALUES (%s)" % (self.insert, self.param), (fingerprint,))
-                        break
-        except self.module.Error as e:
-            logging.error("Failed to get next target - %s", str(e))
-            sys.exit(1)
+                        scanned_urls.extend(duplicates.pop(fingerprint))
 
-        return target
+                    c.executemany("UPDATE targets SET scanned = 1 WHERE url = %s" % self.param, scanned_urls)
+            except self.module.Error as e:
+                logging.error("Failed to get next targets - %s", str(e))
+                sys.exit(1)
+
+            # targets are only marked scanned once handed out, so stopping early
+            # (--count or an interrupt) leaves the rest of the batch unscanned
+            for fingerprint, target in targets.items():
+                # scans can run for a long time, so check the connection before each claim
+                self._ensure_connected()
+                try:
+                    with self._conn() as db, closing(db.cursor()) as c:
+                        # another scanner sharing the database may have claimed the target
+                        # or its fingerprint since the batch was read
+                        c.execute("UPDATE targets SET scanned = 1 WHERE url = %s AND scanned = 0" % self.param,
+                                  (target.url,))
+                        claimed = c.rowcount != 0
+                        if claimed:
+                            c.execute("SELECT fingerprint FROM fingerprints WHERE fingerprint = %s" % self.param,
+                                      (fingerprint,))
+                            claimed = c.fetchone() is None
+                        c.executemany("UPDATE targets SET scanned = 1 WHERE url = %s" % self.param,
+                                      duplicates[fingerprint])
+                        if claimed:
+                            c.execute("%s INTO fingerprints VALUES (%s) %s" % (self.insert, self.param, self.conflict),
+                                      (fingerprint,))
+                except self.module.Error as e:
+                    logging.error("Failed to mark target as scanned - %s", str(e))
+                    sys.exit(1)
+
+                if not claimed:
+                    logging.debug("Skipping (claimed by another scanner): %s", target.url)
+                    continue
+
+                yield target
 
     def add_target(self, url, source=None):
         try:
-            with self.db, closing(self.db.cursor()) as c:
+            with self._conn() as db, closing(db.cursor()) as c:
                 c.execute("%s INTO targets (url, source) VALUES (%s, %s) %s" % (self.insert, self.param, self.param, self.conflict), (url, source))
         except self.module.Error as e:
             logging.error("Failed to add target - %s", str(e))
             sys.exit(1)
 
-    def add_targets(self, urls, source=None):
+    def add_targets(self, urls, source=None, chunk=400):
+        rows = [(url, source) for url in urls]
         try:
-            with self.db, closing(self.db.cursor()) as c:
-                c.executemany("%s INTO targets (url, source) VALUES (%s, %s) %s" % (self.insert, self.param, self.param, self.conflict),
-                              [(url, source) for url in urls])
+            with self._conn() as db, closing(db.cursor()) as c:
+                if self.module_name == "psycopg2":
+                    extras = importlib.import_module("psycopg2.extras", package=None)
+                    extras.execute_values(c, "%s INTO targets (url, source) VALUES %%s %s" % (self.insert, self.conflict),
+                                          rows, page_size=1000)
+                elif self.module_name == "sqlite3":
+                    for i in range(0, len(rows), chunk):
+                        values = rows[i:i + chunk]
+                        c.execute("%s INTO targets (url, source) VALUES %s" % (self.insert, ",".join(["(?, ?)"] * len(values))),
+                                  [value for row in values for value in row])
+                else:
+                    c.executemany("%s INTO targets (url, source) VALUES (%s, %s) %s" % (self.insert, self.param, self.param, self.conflict),
+                                  rows)
         except self.module.Error as e:
             logging.error("Failed to add target - %s", str(e))
             sys.exit(1)
 
     def delete_target(self, url):
         try:
-            with self.db, closing(self.db.cursor()) as c:
+            with self._conn() as db, closing(db.cursor()) as c:
                 c.execute("DELETE FROM targets WHERE url=(%s)" % self.param, (url,))
         except self.module.Error as e:
             logging.error("Failed to delete target - %s", str(e))
             sys.exit(1)
 
-    def get_scanned(self, fingerprint, cursor):
-        for i in range(3):
-            try:
-                cursor.execute("SELECT fingerprint FROM fingerprints WHERE fingerprint = (%s)" % self.param, (fingerprint,))
-                row = cursor.fetchone()
-                break
-            except self.module.Error as e:
-                if "connection already closed" in str(e) or "server closed the connection unexpectedly" in str(e):
-                    logging.warning("Failed to look up fingerprint (retrying) - %s", str(e))
-                    self.connect()
-                    continue
-                else:
-                    logging.error("Failed to look up fingerprint - %s", str(e))
-                    sys.exit(1)
-
-        if row:
-            return row[0]
-        else:
-            return False
-
-    def mark_scanned(self, url, cursor):
-        for i in range(3):
-            try:
-                cursor.execute("UPDATE targets SET scanned = 1 WHERE url = %s" % (self.param,), (url,))
-            except self.module.Error as e:
-                if "connection already closed" in str(e) or "server closed the connection unexpectedly" in str(e):
-                    logging.warning("Failed to mark target as scanned (retrying) - %s", str(e))
-                    self.connect()
-                    continue
-                else:
-                    logging.error("Failed to mark target as scanned - %s", str(e))
-                    sys.exit(1)
-
     def flush_fingerprints(self):
         logging.info("Flushing fingerprints")
         try:
-            with self.db, closing(self.db.cursor()) as c:
+            with self._conn() as db, closing(db.cursor()) as c:
                 c.execute("DELETE FROM fingerprints")
                 c.execute("UPDATE targets SET scanned = 0")
+                c.execute("UPDATE settings SET value = %s WHERE name = %s" % (self.param, self.param),
+                          ("blake2b", "fingerprint_hash"))
+            self.fingerprint_hash = "blake2b"
         except self.module.Error as e:
             logging.error("Failed to flush fingerprints - %s", str(e))
             sys.exit(1)
@@ -602,37 +898,54 @@ class TargetDatabase:
     def flush_targets(self):
         logging.info("Flushing targets")
         try:
-            with self.db, closing(self.db.cursor()) as c:
+            with self._conn() as db, closing(db.cursor()) as c:
                 c.execute("DELETE FROM targets")
         except self.module.Error as e:
             logging.error("Failed to flush targets - %s", str(e))
             sys.exit(1)
 
-    def prune(self, blocklists, randomize=False):
-        fingerprints = set()
+    def load_fingerprint_set(self):
+        try:
+            with self._conn() as db, closing(db.cursor()) as c:
+                c.execute("SELECT fingerprint FROM fingerprints")
+                return {bytes(row[0]) for row in c.fetchall()}
+        except self.module.Error as e:
+            logging.error("Failed to load fingerprints - %s", str(e))
+            sys.exit(1)
 
-        urls = self.get_urls()
+    def prune(self, blocklists, randomize=False):
+        blocklist = Blocklist.merge(blocklists)
+        fingerprints = self.load_fingerprint_set()
 
-        if randomize:
-            random.shuffle(urls)
+        urls = self.get_urls(randomize=randomize)
+        Target.prefetch_resolve(urls)
 
+        scanned_urls = []
+        blocked_urls = []
         for url in urls:
             target = Target(url)
 
-            fingerprint = generate_fingerprint(target)
-            with self.db, closing(self.db.cursor()) as c:
-                if fingerprint in fingerprints or self.get_scanned(fingerprint, c):
-                    logging.debug("Marking scanned (matches fingerprint of another target): %s", target.url)
-                    self.mark_scanned(target.url, c)
-                    continue
+            fingerprint = generate_fingerprint(target, self.fingerprint_hash)
+            if fingerprint in fingerprints:
+                logging.debug("Marking scanned (matches fingerprint of another target): %s", target.url)
+                scanned_urls.append((target.url,))
+                continue
 
-            if True in [blocklist.match(target) for blocklist in blocklists]:
+            if blocklist.match(target):
                 logging.debug("Deleting (matches blocklist pattern): %s", target.url)
-                self.delete_target(target.url)
+                blocked_urls.append((target.url,))
                 continue
 
             fingerprints.add(fingerprint)
 
+        try:
+            with self._conn() as db, closing(db.cursor()) as c:
+                c.executemany("UPDATE targets SET scanned = 1 WHERE url = %s" % self.param, scanned_urls)
+                c.executemany("DELETE FROM targets WHERE url=(%s)" % self.param, blocked_urls)
+        except self.module.Error as e:
+            logging.error("Failed to prune targets - %s", str(e))
+            sys.exit(1)
+
 
 class Target:
     def __init__(self, url):
@@ -642,42 +955,89 @@ class Target:
 
         url_parts = urlparse(url)
         self.host = url_parts.hostname
+        self.ip = resolve_host(self.host)
+        self.ip_int = int(self.ip) if self.ip else None
 
-        try:
-            resolved_ip = socket.gethostbyname(self.host)
-            self.ip = ipaddress.ip_address(resolved_ip)
-        except socket.gaierror:
-            self.ip = None
-            pass
-        except Exception:
-            logging.exception("Failed to resolve hostname: %s", self.host)
+    @staticmethod
+    def prefetch_resolve(urls):
+        hosts = {urlparse(url).hostname for url in urls}
+        hosts = [host for host in hosts if host and host not in HOST_CACHE]
+        if not hosts:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(hosts))) as executor:
+            list(executor.map(resolve_host, hosts))
 
     def get_hash(self):
         if not self.hash:
-            self.hash = generate_hash(self.url)
+            self.hash = generate_hash(self.url).hex()
         return self.hash
 
-    def write_report(self, report_dir, label, vulnerabilities):
-        vulns = {}
-        vulns["vulnerabilities"] = vulnerabilities
-        vulns["starttime"] = str(self.starttime)
-        vulns["endtime"] = str(self.endtime)
-        vulns["url"] = self.url
-        vulns["label"] = label
+    def write_report(self, report_dir, label, vulnerabilities, pretty=False, report_dir_fd=None):
+        vulns = {
+            "vulnerabilities": vulnerabilities,
+            "starttime": str(self.starttime),
+            "endtime": str(self.endtime),
+            "url": self.url,
+            "label": label,
+        }
+
+        filename = self.get_hash() + ".json"
+        if report_dir_fd is None:
+            fd = os.open(os.path.join(report_dir, filename), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        else:
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=report_dir_fd)
 
-        filename = os.path.join(report_dir, self.get_hash() + ".json")
+        if pretty:
+            data = json.dumps(vulns, indent=4, sort_keys=True).encode("utf-8")
+        elif orjson:
+            data = orjson.dumps(vulns)
+        else:
+            data = json.dumps(vulns, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        with os.fdopen(fd, "wb") as outfile:
+            outfile.write(data)
+            print("Report saved to: %s" % os.path.join(report_dir, filename))
+
+
+class IPNetworkSet:
+    def __init__(self, ip_nets):
+        self.ranges = {4: ([], []), 6: ([], [])}
+        bits = {4: 32, 6: 128}
+        for version, net_int, prefixlen in sorted(ip_nets):
+            starts, ends = self.ranges[version]
+            end = net_int | ((1 << (bits[version] - prefixlen)) - 1)
+            if ends and net_int <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(net_int)
+                ends.append(end)
 
-        with open(filename, "w") as outfile:
-            json.dump(vulns, outfile, indent=4, sort_keys=True)
-            print("Report saved to: %s" % outfile.name)
+    def contains_int(self, version, ip_int):
+        starts, ends = self.ranges[version]
+        if not starts:
+            return False
+        i = bisect.bisect_right(starts, ip_int) - 1
+        return i >= 0 and ip_int <= ends[i]
 
 
 class Blocklist:
+    wal_databases = set()
+
     def __init__(self, blocklist):
         self.connect_kwargs = {}
         self.ip_set = set()
         self.host_set = set()
         self.regex_set = set()
+        self.host_suffixes = set()
+        self.frozen = False
+        self._ip_networks = None
+        self._regex = None
+        self._regex_match = None
+        self.regex_dirty = True
+        self.in_batch = False
+        self.db = None
+        self.blocklist_file = None
 
         if blocklist.startswith("postgresql://"):
             self.database = blocklist
@@ -712,6 +1072,7 @@ class Blocklist:
                 sys.exit(1)
 
         if self.database:
+            self.module_name = module_name
             self.module = importlib.import_module(module_name, package=None)
 
             if self.module.paramstyle == "qmark":
@@ -719,6 +1080,9 @@ class Blocklist:
             else:
                 self.param = "%s"
 
+            self.insert_sql = "%s INTO blocklist VALUES (%s)" % (self.insert, self.param)
+            self.delete_sql = "DELETE FROM blocklist WHERE item=(%s)" % self.param
+
             self.connect()
             try:
                 with self.db, closing(self.db.cursor()) as c:
@@ -731,12 +1095,22 @@ class Blocklist:
 
     def connect(self):
         if self.database:
+            if self.db is not None and not getattr(self.db, "closed", False):
+                return
             try:
                 self.db = self.module.connect(self.database, **self.connect_kwargs)
+                if self.module_name == "sqlite3":
+                    with closing(self.db.cursor()) as c:
+                        if self.database not in Blocklist.wal_databases:
+                            c.execute("PRAGMA journal_mode=WAL")
+                            Blocklist.wal_databases.add(self.database)
+                        c.execute("PRAGMA synchronous=NORMAL")
             except self.module.Error as e:
                 logging.error("Error loading database - %s", str(e))
                 sys.exit(1)
         else:
+            if self.blocklist_file is not None and not self.blocklist_file.closed:
+                return
             try:
                 self.blocklist_file = open(self.filename, "a")
             except Exception as e:
@@ -745,35 +1119,141 @@ class Blocklist:
 
     def close(self):
         if self.database:
-            self.db.close()
-        else:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+        elif self.blocklist_file is not None:
             self.blocklist_file.close()
+            self.blocklist_file = None
 
-    def parse_list(self, items):
-        for item in items:
-            if item.startswith("ip:"):
-                ip = item.split(":")[1]
-                try:
-                    ip_net = ipaddress.ip_network(ip)
-                except ValueError as e:
-                    logging.error("Could not parse blocklist item as ip - %s", str(e))
-                self.ip_set.add(ip_net)
-            elif item.startswith("host:"):
-                self.host_set.add(item.split(":")[1])
-            elif item.startswith("regex:"):
-                self.regex_set.add(item.split(":")[1])
-            else:
-                logging.warning("Could not parse blocklist item - %s", item)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def begin(self):
+        self.connect()
+        self.in_batch = True
 
-        pattern = "|".join(self.regex_set)
-        if pattern:
-            self.regex = re.compile(pattern)
+    def commit(self):
+        if self.database:
+            try:
+                self.db.commit()
+            except self.module.Error as e:
+                logging.error("Failed to commit blocklist changes - %s", str(e))
+                sys.exit(1)
+        self.in_batch = False
+        self.freeze()
+
+    def rollback(self):
+        if self.database:
+            self.db.rollback()
+        self.in_batch = False
+
+    @contextmanager
+    def batch(self):
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def transaction(self):
+        if self.in_batch:
+            return nullcontext()
+        return self.db
+
+    def parse_item(self, item):
+        kind, _, value = item.partition(":")
+        if kind == "ip":
+            return kind, parse_cidr(value)
+        elif kind in ("host", "regex"):
+            return kind, value
         else:
-            self.regex = None
+            raise ValueError(item)
+
+    def freeze(self):
+        if self.frozen:
+            return
+        self.ip_set = frozenset(self.ip_set)
+        self.host_set = frozenset(self.host_set)
+        self.host_suffixes = frozenset(self.host_suffixes)
+        self.regex_set = frozenset(self.regex_set)
+        self.frozen = True
+
+    def unfreeze(self):
+        if not self.frozen:
+            return
+        self.ip_set = set(self.ip_set)
+        self.host_set = set(self.host_set)
+        self.host_suffixes = set(self.host_suffixes)
+        self.regex_set = set(self.regex_set)
+        self.frozen = False
+
+    def add_parsed_items(self, parsed_items):
+        # sets stay mutable until the next load or batch commit freezes them
+        self.unfreeze()
+        for kind, value in parsed_items:
+            if kind == "ip":
+                self.ip_set.add(value)
+            elif kind == "host":
+                self.host_set.add(value)
+                if value.startswith("*."):
+                    self.host_suffixes.add(value[1:])
+            else:
+                self.regex_set.add(value)
+
+        self.regex_dirty = True
+        self._ip_networks = None
+
+    def parse_list(self, items):
+        parsed_items = []
+        for item in items:
+            try:
+                parsed_items.append(self.parse_item(item))
+            except ValueError as e:
+                logging.warning("Could not parse blocklist item - %s", str(e))
+
+        self.add_parsed_items(parsed_items)
+        self.freeze()
+
+    def compile_regex(self):
+        self._regex = compile_regex_set(self.regex_set)
+        self._regex_match = self._regex.match if self._regex else None
+        self.regex_dirty = False
+
+    @property
+    def regex(self):
+        if self.regex_dirty:
+            self.compile_regex()
+        return self._regex
+
+    @property
+    def regex_match(self):
+        if self.regex_dirty:
+            self.compile_regex()
+        return self._regex_match
+
+    @property
+    def ip_networks(self):
+        if self._ip_networks is None:
+            self._ip_networks = IPNetworkSet(self.ip_set)
+        return self._ip_networks
+
+    @classmethod
+    def merge(cls, blocklists):
+        return MergedBlocklist(blocklists)
 
     def get_parsed_items(self):
         parsed_ip_set = set()
-        for ip_net in self.ip_set:
+        for version, net_int, prefixlen in self.ip_set:
+            if version == 4:
+                ip_net = ipaddress.IPv4Network((net_int, prefixlen))
+            else:
+                ip_net = ipaddress.IPv6Network((net_int, prefixlen))
             if ip_net.num_addresses == 1:
                 parsed_ip_set.add(str(ip_net[0]))
             else:
@@ -798,69 +1278,53 @@ class Blocklist:
         return items
 
     def add(self, item):
+        self.add_many([item])
+
+    def add_many(self, items):
         self.connect()
 
-        if item.startswith("ip:"):
-            ip = item.split(":")[1]
+        parsed_items = []
+        for item in items:
             try:
-                ip_net = ipaddress.ip_network(ip)
+                parsed_items.append(self.parse_item(item))
             except ValueError as e:
-                logging.error("Could not parse blocklist item as ip - %s", str(e))
+                logging.error("Could not parse blocklist item - %s", str(e))
                 sys.exit(1)
-            self.ip_set.add(ip_net)
-        elif item.startswith("host:"):
-            self.host_set.add(item.split(":")[1])
-        elif item.startswith("regex:"):
-            self.regex_set.add(item.split(":")[1])
-        else:
-            logging.error("Could not parse blocklist item - %s", item)
-            sys.exit(1)
+
+        self.add_parsed_items(parsed_items)
 
         if self.database:
             try:
-                with self.db, closing(self.db.cursor()) as c:
-                    c.execute("%s INTO blocklist VALUES (%s)" % (self.insert, self.param), (item,))
+                with self.transaction(), closing(self.db.cursor()) as c:
+                    c.executemany(self.insert_sql, [(item,) for item in items])
             except self.module.Error as e:
                 logging.error("Failed to add blocklist item - %s", str(e))
                 sys.exit(1)
         else:
             logging.warning("Add ignored (not implemented for file-based blocklist)")
 
-        self.close()
-
     def delete(self, item):
         self.connect()
 
         if self.database:
             try:
-                with self.db, closing(self.db.cursor()) as c:
-                    c.execute("DELETE FROM blocklist WHERE item=(%s)" % self.param, (item,))
+                with self.transaction(), closing(self.db.cursor()) as c:
+                    c.execute(self.delete_sql, (item,))
             except self.module.Error as e:
                 logging.error("Failed to delete blocklist item - %s", str(e))
                 sys.exit(1)
         else:
             logging.warning("Delete ignored (not implemented for file-based blocklist)")
 
-        self.close()
-
     def match(self, target):
-        if self.regex and self.regex.match(target.url):
-            return True
-
-        if target.host in self.host_set:
-            return True
-
-        for ip_net in self.ip_set:
-            if target.ip and target.ip in ip_net:
-                return True
-
-        return False
+        return match_target(target, self.host_set, self.host_suffixes, self.ip_networks, self.regex_match)
 
     def flush(self):
         logging.info("Flushing blocklist")
         if self.database:
+            self.connect()
             try:
-                with self.db, closing(self.db.cursor()) as c:
+                with self.transaction(), closing(self.db.cursor()) as c:
                     c.execute("DELETE FROM blocklist")
             except self.module.Error as e:
                 logging.error("Failed to flush blocklist - %s", str(e))
@@ -872,10 +1336,46 @@ class Blocklist:
                 logging.error("Failed to delete blocklist file - %s", str(e))
                 sys.exit(1)
 
-        self.regex = None
-        self.regex_set = set()
-        self.ip_set = set()
-        self.host_set = set()
+        self.regex_set = frozenset()
+        self.regex_dirty = True
+        self.ip_set = frozenset()
+        self._ip_networks = None
+        self.host_set = frozenset()
+        self.host_suffixes = frozenset()
+        self.frozen = True
+
+
+class MergedBlocklist:
+    def __init__(self, blocklists):
+        self.ip_networks = IPNetworkSet([ip_net for blocklist in blocklists for ip_net in blocklist.ip_set])
+        self.hosts = frozenset(host for blocklist in blocklists for host in blocklist.host_set)
+        self.host_suffixes = frozenset(host[1:] for host in self.hosts if host.startswith("*."))
+
+        self.regex = compile_regex_set(regex for blocklist in blocklists for regex in blocklist.regex_set)
+        self.regex_match = self.regex.match if self.regex else None
+
+        self.match = self.build_match()
+
+    def build_match(self):
+        hosts = self.hosts
+        host_suffixes = self.host_suffixes
+        regex_match = self.regex_match
+        ip_networks = self.ip_networks
+        if not any(starts for starts, ends in ip_networks.ranges.values()):
+            ip_networks = None
+
+        if not hosts and not ip_networks and not regex_match:
+            def match_none(target):
+                return False
+            return match_none
+
+        def match(target):
+            return match_target(target, hosts, host_suffixes, ip_networks, regex_match)
+        return match
+
+    def match_batch(self, targets):
+        match = self.match
+        return [match(target) for target in targets]
 
 
 if __name__ == "__main__":